@@ -12,28 +12,46 @@ def _mcp_print(*args, **kwargs):
 print = _mcp_print
 
 from bioos_mcp.tools.rerank_client import RerankClient
+from bioos_mcp.tools.ttl_cache import TTLCache
+import hashlib
 import json
+import logging
 import os
 import re
 import subprocess
-from dataclasses import dataclass, field
+import traceback
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict, List, Tuple, Optional, Union
-from pydantic import BaseModel, Field, model_validator, field_validator
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Tuple, Optional, Union, get_args
+from pydantic import BaseModel, Field, model_validator
 import requests
+from urllib3.util.retry import Retry
+import httpx
 from mcp.server.fastmcp import FastMCP
 
 from bioos_mcp.tools.dockstore_search import DockstoreSearch
-from bioos_mcp.tools.fetch_wdl_from_dockstore import DockstoreDownloader
+from bioos_mcp.tools.fetch_wdl_from_dockstore import DockstoreDownloader, scan_workflow_dir
 from bioos_mcp.tools.workspace_profile import get_workspace_profile_data
 from bioos.resource.workflows import Submission
 from bioos.service.api import list_workflows,list_submissions
-from bioos_mcp.tools.compose_tools import build_inputs
+from bioos_mcp.tools.compose_tools import build_inputs, dump_json
+from bioos_mcp.tools.bioos_session import (
+    bioos_session,
+    clear_workspace_ids,
+    get_credentials,
+    get_workspace_id,
+    refresh_env_credentials,
+    reset_login,
+)
 from bioos.ops.workspace_files import upload_local_files_to_workspace
 from bioos import bioos
 import asyncio, functools
+from concurrent.futures import ThreadPoolExecutor
 
 
+# FastMCP 初始化时配置根日志处理器（输出到 stderr），这里的日志随之输出
+logger = logging.getLogger(__name__)
+
 # 创建 MCP 服务器，不设置连接超时时间
 mcp = FastMCP("Bio-OS-MCP-Server")
 
@@ -41,29 +59,198 @@ mcp = FastMCP("Bio-OS-MCP-Server")
 DEFAULT_ENDPOINT = "https://bio-top.miracle.ac.cn"
 
 
-RERANKER = RerankClient(api_url="http://10.22.17.85:10802/rerank")
+RERANK_API_URL = "http://10.22.17.85:10802/rerank"
+DOCKER_BUILD_SERVICE_URL = "http://10.20.16.38:3001"
 
 
-# 辅助函数：获取 ak、sk，用户输入优先
-def get_credentials(user_ak: Optional[str] = None, user_sk: Optional[str] = None) -> Tuple[str, str]:
-    """获取 ak、sk，用户输入优先于环境变量"""
-    ak = user_ak if user_ak is not None else os.getenv("MIRACLE_ACCESS_KEY")
-    sk = user_sk if user_sk is not None else os.getenv("MIRACLE_SECRET_KEY")
-    
-    if not ak:
-        raise ValueError("未提供 MIRACLE_ACCESS_KEY，请设置环境变量 'MIRACLE_ACCESS_KEY' 或在参数中指定")
-    if not sk:
-        raise ValueError("未提供 MIRACLE_SECRET_KEY，请设置环境变量 'MIRACLE_SECRET_KEY' 或在参数中指定")
-    
-    return ak, sk
+def _create_http_session() -> requests.Session:
+    """创建模块共享的 HTTP 会话，连接池在各次请求间复用"""
+    session = requests.Session()
+    # 只对建立连接失败及网关类错误退避重试；读超时不重试，服务卡住时由调用方尽快回退。
+    # urllib3 默认不重试 POST，目前只有重排接口使用该会话，重排请求是幂等的，可以安全重试
+    retry = Retry(total=None, connect=1, read=0, status=3, backoff_factor=0.2,
+                  status_forcelist=(502, 503, 504), allowed_methods=frozenset({"POST"}))
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+HTTP_SESSION = _create_http_session()
+
+# 镜像构建服务的异步客户端，构建提交与状态轮询复用同一组长连接；
+# 读写超时按单次 I/O 计算而非整个传输，大文件持续上传不会超时，服务端停滞时则及时报错
+DOCKER_BUILD_CLIENT = httpx.AsyncClient(
+    base_url=DOCKER_BUILD_SERVICE_URL,
+    timeout=httpx.Timeout(60.0, connect=5.0),
+    # 建立连接失败时重试，请求发出后不重试
+    transport=httpx.AsyncHTTPTransport(
+        retries=3,
+        limits=httpx.Limits(max_keepalive_connections=4),
+    ),
+)
+
+# 重排请求使用独立线程池，不与 asyncio.to_thread 中的 SDK 调用争用默认线程池；
+# 重排服务为远程接口，保留少量并发即可
+RERANK_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rerank")
+# 单次重排请求的文本数上限，超出时按长度分批并发发送
+RERANK_BATCH_SIZE = 32
+
+# 同时发往 Dockstore 的 HTTP 请求上限，避免并发调用压垮远端或被限流；
+# 检索按一次请求占用，下载在每个 HTTP 请求期间占用，长时间的下载不会独占名额
+DOCKSTORE_CONCURRENCY = asyncio.Semaphore(4)
+
+# Dockstore 检索与下载客户端各次调用共用同一实例（连接池与固定请求头），X-Request-ID 按请求生成
+DOCKSTORE_CLIENT = DockstoreSearch()
+DOCKSTORE_DOWNLOADER = DockstoreDownloader(request_limit=DOCKSTORE_CONCURRENCY)
+
+# 重排结果缓存：(用户关键词, 命中 ID 列表, top_n) -> 重排结果
+RERANK_CACHE = TTLCache(max_items=4096, ttl_sec=20)
+
+# workflow 输入模板缓存：(endpoint, 凭证摘要, 工作空间名称, workflow 名称) -> 模板
+WORKFLOW_TEMPLATE_CACHE = TTLCache(max_items=256, ttl_sec=300)
+
+
+def credentials_digest(ak: str, sk: str) -> str:
+    """凭证的 sha256 摘要，用作缓存键，避免在缓存中保存明文 sk"""
+    return hashlib.sha256(f"{ak}\0{sk}".encode()).hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def get_reranker() -> RerankClient:
+    """首次使用时再创建重排客户端，后续调用复用同一实例"""
+    return RerankClient(api_url=RERANK_API_URL, session=HTTP_SESSION)
+
 
 def get_workspace_id_by_name(workspace_name: str) -> str:
-    """根据工作空间名称解析得到其 ID"""
-    workspaces = bioos.list_workspaces()
-    workspace_info = workspaces.query(f"Name=='{workspace_name}'")
-    if getattr(workspace_info, "empty", True):
-        raise ValueError(f"未找到工作空间：{workspace_name}")
-    return str(workspace_info["ID"].iloc[0])
+    """根据工作空间名称解析得到其 ID（按登录凭证缓存），需在 bioos_session 内调用"""
+    return get_workspace_id(workspace_name)
+
+
+async def run_bioos(endpoint: str, ak: str, sk: str, fn: Callable[[], Any]) -> Any:
+    """在同一个工作线程内登录并执行 fn
+
+    SDK 客户端为进程内全局状态，登录与后续调用必须处在同一个 bioos_session 中，
+    否则并发的其他凭证可能在两次线程切换之间重新登录。
+    """
+    def call():
+        with bioos_session(endpoint, ak, sk):
+            return fn()
+
+    return await asyncio.to_thread(call)
+
+
+# 每个输出流最多保留的行数，超出时只保留末尾部分
+MAX_OUTPUT_LINES = 10000
+# 提交日志只返回末尾部分，完整日志可通过 output_dir 写入本地
+LOG_TAIL_LINES = 200
+# 每次从子进程管道读取的字节数
+READ_CHUNK_BYTES = 64 * 1024
+
+
+async def _collect_lines(stream: asyncio.StreamReader, lines: deque) -> int:
+    """按固定大小分块读取子进程输出并切分成行，写入有界队列，返回读取的总行数
+
+    不使用 readline，单行再长也不会触发 StreamReader 的长度上限。
+    """
+    total = 0
+    partial: List[bytes] = []
+    while True:
+        chunk = await stream.read(READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        start = 0
+        end = chunk.find(b"\n")
+        while end != -1:
+            partial.append(chunk[start:end + 1])
+            lines.append(b"".join(partial).decode(errors="replace"))
+            partial.clear()
+            total += 1
+            start = end + 1
+            end = chunk.find(b"\n", start)
+        if start < len(chunk):
+            partial.append(chunk[start:])
+    if partial:
+        lines.append(b"".join(partial).decode(errors="replace"))
+        total += 1
+    return total
+
+
+def _join_tail(lines: deque, total: int) -> str:
+    """拼接保留的输出行，有行被丢弃时在开头注明"""
+    dropped = total - len(lines)
+    text = "".join(lines)
+    return f"...（已省略前 {dropped} 行）\n{text}" if dropped else text
+
+
+async def run_command(cmd: List[str], max_lines: int = MAX_OUTPUT_LINES) -> subprocess.CompletedProcess:
+    """异步执行外部命令，语义等同 subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+    使用 asyncio 子进程，避免 womtool / bw 等长耗时命令阻塞事件循环；
+    输出分块流式读取，每个流只保留最近 max_lines 行，
+    调用被取消或读取出错时结束子进程并等待其退出。
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    out_lines: deque = deque(maxlen=max_lines)
+    err_lines: deque = deque(maxlen=max_lines)
+    try:
+        out_total, err_total = await asyncio.gather(
+            _collect_lines(proc.stdout, out_lines),
+            _collect_lines(proc.stderr, err_lines),
+        )
+        returncode = await proc.wait()
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+    stdout = _join_tail(out_lines, out_total)
+    stderr = _join_tail(err_lines, err_total)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, output=stdout, stderr=stderr)
+    return subprocess.CompletedProcess(cmd, returncode, stdout=stdout, stderr=stderr)
+
+def format_command_output(stdout: Optional[str], stderr: Optional[str]) -> str:
+    """合并命令的 stdout 与 stderr，忽略空白输出"""
+    parts = [text.strip() for text in (stdout, stderr) if text and text.strip()]
+    return "\n".join(parts)
+
+
+async def join_inflight(inflight: Dict[Any, asyncio.Future], key: Any,
+                        start: Callable[[], Awaitable[Any]]) -> Any:
+    """相同 key 已有进行中的任务时直接等待它，否则调用 start 发起新任务；任务结束后移出 inflight"""
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(start())
+        inflight[key] = task
+        task.add_done_callback(lambda _: inflight.pop(key, None))
+    # 单个调用方超时取消时不影响其他等待同一请求的调用方
+    return await asyncio.shield(task)
+
+
+def iter_prefixed_env_entries(raw: bytes, prefix: bytes):
+    """
+    Yield NUL-separated environ entries that start with `prefix`.
+    Uses bytes.find to jump between matches, so non-matching entries
+    are never sliced or copied.
+    """
+    marker = b"\x00" + prefix
+    if raw.startswith(prefix):
+        start = 0
+    else:
+        idx = raw.find(marker)
+        start = -1 if idx == -1 else idx + 1
+    while start != -1:
+        end = raw.find(b"\x00", start)
+        if end == -1:
+            end = len(raw)
+        yield raw[start:end]
+        idx = raw.find(marker, end)
+        start = -1 if idx == -1 else idx + 1
 
 def load_miracle_env_from_parent_proc():
     """
@@ -74,15 +261,21 @@ def load_miracle_env_from_parent_proc():
     try:
         # Open the parent process's environ file
         with open(f"/proc/{ppid}/environ", "rb") as f:
-            raw = f.read().decode()
-            parent_env = dict(x.split("=", 1) for x in raw.split("\x00") if "=" in x)
-        
-        # Only write variables starting with 'MIRACLE' to current environment
-        for k, v in parent_env.items():
-            if k.startswith("MIRACLE"):
-                os.environ[k] = v
-                # Optional: print confirmation
-                print(f"Loaded {k}={v}")
+            raw = f.read()
+
+        # Only decode and write variables starting with 'MIRACLE'
+        loaded = []
+        for entry in iter_prefixed_env_entries(raw, b"MIRACLE"):
+            k, sep, v = entry.partition(b"=")
+            if not sep:
+                continue
+            key = k.decode()
+            os.environ[key] = v.decode()
+            loaded.append(key)
+
+        if loaded:
+            refresh_env_credentials()
+            print(f"Loaded {', '.join(loaded)}")
     except Exception as e:
         print(f"Failed to load parent MIRACLE env: {e}")
 
@@ -406,39 +599,30 @@ class WorkflowInputParams(BaseModel):
         ..., description="单样本 dict 或多样本 list[dict]"
     )
 
-    @model_validator(mode="before")
-    def _normalize_params(cls, values):
-        raw = values.get("params")
-        n = values.get("sample_count")
+    @model_validator(mode="after")
+    def _normalize_params(self):
+        """
+        在字段校验之后统一规范化为 list[dict]，
+        Pydantic 只需校验用户实际传入的样本，而不是复制后的 n 份
+        """
+        raw = self.params
+        n = self.sample_count
 
-        # --------- 单个 dict ---------
+        # --------- 单个 dict → 复制 ---------
+        # 各样本共享同一个 dict 对象；build_inputs 只读取样本，不会修改
         if isinstance(raw, dict):
-            values["params"] = [raw] * n
-            return values
+            self.params = [raw] * n
+            return self
 
         # --------- list[dict] ---------
-        if isinstance(raw, list):
-            if len(raw) == n:  # 完整列表，直接用
-                return values
-            if len(raw) == 1 and n > 1:  # 仅 1 条 → 复制
-                values["params"] = raw * n
-                return values
-            raise ValueError(
-                f"样本数量不一致：sample_count={n}，但 params 中有 {len(raw)} 条"
-            )
-
-        raise TypeError("params 必须是 dict 或 list[dict]")
-
-    @field_validator("params", mode="after")
-    def _check_params_list(cls, v):
-        """
-        此时 v 一定已经是 list[dict]
-        """
-        if not isinstance(v, list):
-            raise TypeError("内部逻辑错误：params 应当被规范化为 list")
-        if not all(isinstance(item, dict) for item in v):
-            raise TypeError("params 中每个样本必须是 dict")
-        return v
+        if len(raw) == n:  # 完整列表，直接用
+            return self
+        if len(raw) == 1 and n > 1:  # 仅 1 条 → 复制
+            self.params = raw * n
+            return self
+        raise ValueError(
+            f"样本数量不一致：sample_count={n}，但 params 中有 {len(raw)} 条"
+        )
 
 
 class WorkflowInputValidateConfig(BaseModel):
@@ -461,8 +645,10 @@ ALLOWED_FIELDS = {
 }
 
 # 定义查询相关的常量
-ALLOWED_QUERY_TYPES = ["match_phrase", "wildcard"]  # 支持的查询类型
+QueryType = Literal["match_phrase", "wildcard"]  # 支持的查询类型，由 Pydantic 直接校验
+ALLOWED_QUERY_TYPES = list(get_args(QueryType))
 DEFAULT_QUERY_TYPE = "match_phrase"  # 默认查询类型
+QUERY_OPERATORS = frozenset(("AND", "OR"))  # 支持的条件组合方式，其他值按 AND 处理
 
 
 class DockstoreSearchConfig(BaseModel):
@@ -470,8 +656,9 @@ class DockstoreSearchConfig(BaseModel):
     用于定义和验证搜索参数
     """
     top_n: int = Field(default=3, description="返回前 N 条结果")
+    rerank_top_k: int = Field(default=50, ge=1, description="参与重排的 ES 命中数上限")
     query: List[List[str]] = Field(default_factory=list, description="搜索条件列表 [field, match_type, term]")
-    query_type: str = Field(default=DEFAULT_QUERY_TYPE, description="查询类型")
+    query_type: QueryType = Field(default=DEFAULT_QUERY_TYPE, description="查询类型")
     sentence: bool = Field(default=False, description="是否作为句子搜索")
     output_full: bool = Field(default=False, description="是否输出完整结果")
     get_files: Optional[str] = Field(default=None, description="获取特定工作流文件的路径")
@@ -479,12 +666,10 @@ class DockstoreSearchConfig(BaseModel):
     @model_validator(mode="after")
     def validate_config(self):
         """配置验证方法
-        确保提供了必要的搜索参数并验证查询类型
+        确保提供了必要的搜索参数（查询类型由 QueryType 字面量类型校验）
         """
         if not self.query and not self.get_files:
             raise ValueError("必须提供搜索条件或工作流路径")
-        if self.query_type not in ALLOWED_QUERY_TYPES:
-            raise ValueError(f"不支持的查询类型: {self.query_type}")
         return self
 
 
@@ -503,17 +688,66 @@ class DockerBuildConfig(BaseModel):
     namespace_name: str = Field(default="auto-build", description="命名空间")
 
 
+# womtool 校验通过的结果缓存：(校验类型, 文件内容哈希) -> 返回文本
+VALIDATE_CACHE = TTLCache(max_items=256, ttl_sec=3600)
+# 进行中的 womtool 校验：内容相同的并发校验只启动一次 JVM
+_INFLIGHT_VALIDATIONS: Dict[Tuple[str, str], asyncio.Future] = {}
+
+_WDL_IMPORT_RE = re.compile(rb"""^\s*import\s+["']([^"']+)["']""", re.MULTILINE)
+
+
+def wdl_content_digest(wdl_path: str, *extra_paths: str) -> Optional[str]:
+    """对 WDL 主文件、其本地 import 的文件以及附加文件的内容求哈希
+
+    任一文件无法读取时返回 None，由 womtool 自行报告错误。
+    """
+    digest = hashlib.sha256()
+    pending = [os.path.abspath(wdl_path)]
+    seen = set()
+    try:
+        while pending:
+            path = pending.pop()
+            if path in seen:
+                continue
+            seen.add(path)
+            data = Path(path).read_bytes()
+            digest.update(path.encode())
+            digest.update(data)
+            for ref in _WDL_IMPORT_RE.findall(data):
+                if b"://" in ref:
+                    # 远程 import 只记录地址
+                    digest.update(ref)
+                else:
+                    pending.append(os.path.normpath(os.path.join(os.path.dirname(path), ref.decode())))
+        for extra in extra_paths:
+            digest.update(Path(extra).read_bytes())
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
 @mcp.tool()
 async def validate_wdl(config: WDLValidateConfig) -> str:
     """验证 WDL 文件的语法正确性"""
     try:
+        # 文件内容未变化时直接返回上次校验通过的结果，避免重复启动 JVM
+        digest = await asyncio.to_thread(wdl_content_digest, config.wdl_path)
+        if digest is not None:
+            cached = VALIDATE_CACHE.get(("wdl", digest))
+            if cached is not None:
+                return cached
+
         validate_wdl_cmd = ["womtool", "validate", config.wdl_path]
-        result = subprocess.run(validate_wdl_cmd,
-                                capture_output=True,
-                                text=True,
-                                check=True)
+        if digest is not None:
+            result = await join_inflight(_INFLIGHT_VALIDATIONS, ("wdl", digest),
+                                         lambda: run_command(validate_wdl_cmd))
+        else:
+            result = await run_command(validate_wdl_cmd)
 
-        return f"WDL 文件验证通过！\n{result.stdout if result.stdout else '语法正确'}"
+        message = f"WDL 文件验证通过！\n{result.stdout if result.stdout else '语法正确'}"
+        if digest is not None:
+            VALIDATE_CACHE.set(("wdl", digest), message)
+        return message
 
     except subprocess.CalledProcessError as e:
         error_msg = e.stderr if e.stderr else e.stdout
@@ -534,9 +768,7 @@ async def list_bioos_workspaces(config: ListWorkspaceConfig) -> List[Dict[str, s
     """
     ak, sk = get_credentials(config.ak, config.sk)
 
-    bioos.login(endpoint=config.endpoint, access_key=ak, secret_key=sk)
-
-    workspaces = bioos.list_workspaces()
+    workspaces = await run_bioos(config.endpoint, ak, sk, bioos.list_workspaces)
 
     # 若为空，直接返回空列表
     if getattr(workspaces, "empty", False):
@@ -553,16 +785,15 @@ async def list_bioos_workspaces(config: ListWorkspaceConfig) -> List[Dict[str, s
     if config.page_size and config.page_size > 0:
         df = df.head(config.page_size)
 
-    return [
-        {"Name": str(row.Name), "Description": str(row.Description) if row.Description is not None else ""}
-        for row in df.itertuples(index=False)
-    ]
+    names = df["Name"].astype(str).tolist()
+    descriptions = df["Description"].fillna("").astype(str).tolist()
+    return [{"Name": n, "Description": d} for n, d in zip(names, descriptions)]
 
 
 @mcp.tool(description="获取指定工作空间的全貌摘要，用于大模型理解 workspace profile")
 async def get_workspace_profile(cfg: GetWorkspaceProfileConfig) -> Dict[str, Any]:
     try:
-        return get_workspace_profile_data(cfg)
+        return await asyncio.to_thread(get_workspace_profile_data, cfg)
     except Exception as e:
         return {"error": str(e)}
 
@@ -581,16 +812,12 @@ async def import_workflow(config: WorkflowImportConfig) -> str:
         config.workflow_desc
     ]
 
-    if config.main_workflow_path:
-        cmd.extend(["--main_path", config.main_workflow_path])
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    cmd.extend(iter_cli_options(config, BW_IMPORT_OPTIONS))
+    result = await run_command(cmd)
+    # 重新导入同名 workflow 后输入参数可能变化，丢弃已缓存的模板
+    WORKFLOW_TEMPLATE_CACHE.clear()
     # 同时返回 stderr 和 stdout 的内容
-    output = []
-    if result.stdout:
-        output.append(result.stdout)
-    if result.stderr:
-        output.append(result.stderr)
-    return "\n".join(output)
+    return format_command_output(result.stdout, result.stderr)
 
 
 
@@ -600,15 +827,23 @@ async def generate_inputs_json_template_bioos(cfg: BioosWorkflowJsonConfig) -> D
     try:
         # 获取 ak、sk，用户输入优先于环境变量
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        # 登录 Bio-OS
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        # 解析工作空间 ID
-        workspace_id = get_workspace_id_by_name(cfg.workspace_name)
-        # 获取工作空间和工作流
-        ws = bioos.Workspace(workspace_id)
-        workflow = ws.workflow(cfg.workflow_name)
-        # 获取输入参数模板
-        inputs = workflow.get_input_template()
+        # 同一 workflow 的模板在缓存有效期内直接返回，不再登录和请求 Bio-OS
+        cache_key = (cfg.endpoint, credentials_digest(ak, sk), cfg.workspace_name, cfg.workflow_name)
+        inputs = WORKFLOW_TEMPLATE_CACHE.get(cache_key)
+        if inputs is not None:
+            return inputs
+
+        def call():
+            # 解析工作空间 ID
+            workspace_id = get_workspace_id_by_name(cfg.workspace_name)
+            # 获取工作空间和工作流
+            ws = bioos.Workspace(workspace_id)
+            workflow = ws.workflow(cfg.workflow_name)
+            # 获取输入参数模板
+            return workflow.get_input_template()
+
+        inputs = await run_bioos(cfg.endpoint, ak, sk, call)
+        WORKFLOW_TEMPLATE_CACHE.set(cache_key, inputs)
         return inputs
     except Exception as e:
         return {"error": str(e)}
@@ -620,7 +855,7 @@ async def compose_input_json(cfg: WorkflowInputParams) -> str:
         return "❌ 参数错误\n" + err
     out = Path(cfg.output_json)
     out.parent.mkdir(parents=True, exist_ok=True)
-    out.write_text(json.dumps(filled, indent=2))
+    out.write_bytes(dump_json(filled))
     return f"✅ 已生成 {out}（{len(filled)} 个样本）"
 
 @mcp.tool()
@@ -628,16 +863,26 @@ async def validate_workflow_input_json(
         config: WorkflowInputValidateConfig) -> str:
     """验证工作流输入 JSON 文件"""
     try:
+        digest = await asyncio.to_thread(wdl_content_digest, config.wdl_path, config.input_json)
+        if digest is not None:
+            cached = VALIDATE_CACHE.get(("inputs", digest))
+            if cached is not None:
+                return cached
+
         validate_inputs_cmd = [
             "womtool", "validate", config.wdl_path, "--inputs",
             config.input_json
         ]
-        result = subprocess.run(validate_inputs_cmd,
-                                capture_output=True,
-                                text=True,
-                                check=True)
+        if digest is not None:
+            result = await join_inflight(_INFLIGHT_VALIDATIONS, ("inputs", digest),
+                                         lambda: run_command(validate_inputs_cmd))
+        else:
+            result = await run_command(validate_inputs_cmd)
 
-        return f"输入文件验证通过！\n{result.stdout if result.stdout else '格式正确，所有必需参数都已提供'}"
+        message = f"输入文件验证通过！\n{result.stdout if result.stdout else '格式正确，所有必需参数都已提供'}"
+        if digest is not None:
+            VALIDATE_CACHE.set(("inputs", digest), message)
+        return message
 
     except subprocess.CalledProcessError as e:
         error_msg = e.stderr if e.stderr else e.stdout
@@ -649,6 +894,37 @@ async def validate_workflow_input_json(
 
 
 
+# 可选命令行参数映射表：(配置字段, 命令行参数, 是否为开关参数)
+# 开关参数在字段为真时追加；取值参数在字段非空时追加 "参数 值"
+BW_OPTIONS: List[Tuple[str, str, bool]] = [
+    ("data_model_name", "--data_model_name", False),
+    ("call_caching", "--call_caching", True),
+    ("submission_desc", "--submission_desc", False),
+    ("force_reupload", "--force_reupload", True),
+    ("mount_tos", "--mount_tos", True),
+    ("monitor", "--monitor", True),
+    ("monitor_interval", "--monitor_interval", False),
+    ("download_results", "--download_results", True),
+    ("download_dir", "--download_dir", False),
+]
+
+BW_IMPORT_OPTIONS: List[Tuple[str, str, bool]] = [
+    ("main_workflow_path", "--main_path", False),
+]
+
+
+def iter_cli_options(cfg: BaseModel, options: List[Tuple[str, str, bool]]):
+    """按映射表逐个产出需要追加的命令行参数"""
+    for attr, flag, is_switch in options:
+        value = getattr(cfg, attr)
+        if is_switch:
+            if value:
+                yield flag
+        elif value is not None and value != "":
+            yield flag
+            yield str(value)
+
+
 def build_bw_cmd(cfg: SubmitWorkflowConfig) -> list[str]:
     ak, sk = get_credentials(cfg.ak, cfg.sk)
     cmd: list[str] = [
@@ -660,26 +936,7 @@ def build_bw_cmd(cfg: SubmitWorkflowConfig) -> list[str]:
         "--workflow_name", cfg.workflow_name,
         "--input_json", cfg.input_json,
     ]
-
-    if cfg.data_model_name:
-        cmd += ["--data_model_name", cfg.data_model_name]
-    if cfg.call_caching:
-        cmd += ["--call_caching"]
-    if cfg.submission_desc:
-        cmd += ["--submission_desc", cfg.submission_desc]
-    if cfg.force_reupload:
-        cmd += ["--force_reupload"]
-    if cfg.mount_tos:
-        cmd += ["--mount_tos"]
-    if cfg.monitor:
-        cmd += ["--monitor"]
-    if cfg.monitor_interval is not None:
-        cmd += ["--monitor_interval", str(cfg.monitor_interval)]
-    if cfg.download_results:
-        cmd += ["--download_results"]
-    if cfg.download_dir:
-        cmd += ["--download_dir", cfg.download_dir]
-
+    cmd.extend(iter_cli_options(cfg, BW_OPTIONS))
     return cmd
 
 
@@ -689,20 +946,10 @@ async def submit_workflow(config: SubmitWorkflowConfig) -> str:
     try:
         cmd = build_bw_cmd(config)
 
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-
-        outs = []
-        if result.stdout and result.stdout.strip():
-            outs.append(result.stdout.strip())
-        if result.stderr and result.stderr.strip():
-            outs.append(result.stderr.strip())
+        result = await run_command(cmd)
 
-        return "\n".join(outs) if outs else "工作流提交成功！可使用 `check_workflow_status` 查询执行状态。"
+        output = format_command_output(result.stdout, result.stderr)
+        return output or "工作流提交成功！可使用 `check_workflow_status` 查询执行状态。"
 
     except subprocess.CalledProcessError as e:
         msg = []
@@ -716,6 +963,10 @@ async def submit_workflow(config: SubmitWorkflowConfig) -> str:
         return f"提交过程出现错误：{e}"
 
 
+# 进行中的状态查询：同一提交/导入的并发轮询共用一次 bw_* 子进程
+_INFLIGHT_STATUS_CHECKS: Dict[Tuple[str, ...], asyncio.Future] = {}
+
+
 @mcp.tool()
 async def check_workflow_run_status(config: WorkflowStatusConfig) -> str:
     """查询工作流运行状态"""
@@ -728,13 +979,8 @@ async def check_workflow_run_status(config: WorkflowStatusConfig) -> str:
         config.submission_id
     ]
 
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-    output = []
-    if result.stdout:
-        output.append(result.stdout)
-    if result.stderr:
-        output.append(result.stderr)
-    return "\n".join(output)
+    result = await join_inflight(_INFLIGHT_STATUS_CHECKS, tuple(cmd), lambda: run_command(cmd))
+    return format_command_output(result.stdout, result.stderr)
 
 
 @mcp.tool()
@@ -749,13 +995,8 @@ async def check_workflow_import_status(config: WorkflowImportStatusConfig) -> st
         config.workflow_id
     ]
 
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-    output = []
-    if result.stdout:
-        output.append(result.stdout)
-    if result.stderr:
-        output.append(result.stderr)
-    return "\n".join(output)
+    result = await join_inflight(_INFLIGHT_STATUS_CHECKS, tuple(cmd), lambda: run_command(cmd))
+    return format_command_output(result.stdout, result.stderr)
 
 
 @mcp.tool()
@@ -773,13 +1014,42 @@ async def get_workflow_logs(config: WorkflowLogsConfig) -> str:
     if config.output_dir != ".":
         cmd.extend(["--output_dir", config.output_dir])
 
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-    output = []
-    if result.stdout:
-        output.append(result.stdout)
-    if result.stderr:
-        output.append(result.stderr)
-    return "\n".join(output)
+    result = await run_command(cmd, max_lines=LOG_TAIL_LINES)
+    return format_command_output(result.stdout, result.stderr)
+
+
+# 批量查询时同时运行的子进程上限
+BATCH_CONCURRENCY = 8
+
+
+async def run_submission_batch(configs: List[BaseModel],
+                               handler: Callable[[Any], Awaitable[str]]) -> List[Dict[str, str]]:
+    """按提交并发调用单条查询工具，结果顺序与 configs 一致，单条失败不影响其余结果"""
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run_one(cfg) -> Dict[str, str]:
+        async with semaphore:
+            try:
+                result = await handler(cfg)
+            except subprocess.CalledProcessError as e:
+                result = f"查询失败：\n{format_command_output(e.stdout, e.stderr) or e}"
+            except Exception as e:
+                result = f"查询失败：{e}"
+        return {"workspace_name": cfg.workspace_name, "submission_id": cfg.submission_id, "result": result}
+
+    return list(await asyncio.gather(*(run_one(cfg) for cfg in configs)))
+
+
+@mcp.tool()
+async def check_workflow_run_status_batch(configs: List[WorkflowStatusConfig]) -> List[Dict[str, str]]:
+    """批量查询多个工作流提交的运行状态"""
+    return await run_submission_batch(configs, check_workflow_run_status)
+
+
+@mcp.tool()
+async def get_workflow_logs_batch(configs: List[WorkflowLogsConfig]) -> List[Dict[str, str]]:
+    """批量获取多个工作流提交的执行日志"""
+    return await run_submission_batch(configs, get_workflow_logs)
 
 
 @mcp.tool(description="Bio-OS 删除工作流提交")
@@ -788,9 +1058,10 @@ async def delete_submission(cfg: BioosDeleteSubmissionConfig) -> Dict[str, Any]:
     try:
         # 获取 ak、sk，用户输入优先于环境变量
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        workspace_id = get_workspace_id_by_name(cfg.workspace_name)
-        result = Submission(workspace_id, cfg.submission_id).delete()
+        result = await run_bioos(
+            cfg.endpoint, ak, sk,
+            lambda: Submission(get_workspace_id_by_name(cfg.workspace_name), cfg.submission_id).delete(),
+        )
         return {"success": True, "message": f"提交 '{cfg.submission_id}' 已成功删除", "result": result}
     except Exception as e:
         return {"error": str(e)}
@@ -798,17 +1069,14 @@ async def delete_submission(cfg: BioosDeleteSubmissionConfig) -> Dict[str, Any]:
 @mcp.tool(description="列出指定工作空间的 submissions")
 async def list_submissions_from_workspace(cfg: ListSubmissionConfig) -> List[Dict[str, Any]]:
     ak, sk = get_credentials(cfg.ak, cfg.sk)
-    bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-    workspace_id = get_workspace_id_by_name(cfg.workspace_name)
-
-    items = list_submissions(
-        workspace_id=workspace_id,
+    items = await run_bioos(cfg.endpoint, ak, sk, lambda: list_submissions(
+        workspace_id=get_workspace_id_by_name(cfg.workspace_name),
         workflow_name=cfg.workflow_name,
         search_keyword=cfg.search_keyword,
         status=cfg.status,
         page_number=cfg.page_number,
         page_size=cfg.page_size,
-    )
+    ))
     return items or []
 
 
@@ -823,15 +1091,12 @@ async def list_workflows_from_workspace(cfg: ListWorkflowConfig) -> List[Dict[st
     - 返回工作流列表，包含 ID、Name、Description 等信息
     """
     ak, sk = get_credentials(cfg.ak, cfg.sk)
-    bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-    workspace_id = get_workspace_id_by_name(cfg.workspace_name)
-
-    items = list_workflows(
+    items = await run_bioos(cfg.endpoint, ak, sk, lambda: list_workflows(
         search_keyword=cfg.search_keyword,
         page_number=cfg.page_number,
         page_size=cfg.page_size,
-        workspace_id=workspace_id,
-    )
+        workspace_id=get_workspace_id_by_name(cfg.workspace_name),
+    ))
     return items or []
 
 
@@ -840,12 +1105,13 @@ async def list_workflows_from_workspace(cfg: ListWorkflowConfig) -> List[Dict[st
 async def list_files_from_workspace(cfg: ListFilesConfig) -> List[Dict[str, Any]]:
 
     ak, sk = get_credentials(cfg.ak, cfg.sk)
-    bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-    workspace_id = get_workspace_id_by_name(cfg.workspace_name)
-    ws = bioos.workspace(workspace_id)
-    
+
+    def call():
+        ws = bioos.workspace(get_workspace_id_by_name(cfg.workspace_name))
+        return ws.files.list(prefix=cfg.prefix, recursive=cfg.recursive)
+
     try:
-        files_df = ws.files.list(prefix=cfg.prefix, recursive=cfg.recursive)
+        files_df = await run_bioos(cfg.endpoint, ak, sk, call)
         
         if hasattr(files_df, "empty") and getattr(files_df, "empty"):
             return []
@@ -869,19 +1135,19 @@ async def download_files_from_workspace(cfg: DownloadFilesConfig) -> Dict[str, A
     - 返回下载结果，包括成功状态、下载的文件列表等信息
     """
     ak, sk = get_credentials(cfg.ak, cfg.sk)
-    bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-    workspace_id = get_workspace_id_by_name(cfg.workspace_name)
-    ws = bioos.workspace(workspace_id)
-    
+    workspace_id = None
+
+    def call():
+        nonlocal workspace_id
+        workspace_id = get_workspace_id_by_name(cfg.workspace_name)
+        ws = bioos.workspace(workspace_id)
+        return ws.files.download(sources=cfg.sources, target=cfg.target, flatten=cfg.flatten)
+
     try:
         target_path = Path(cfg.target)
         target_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        result = ws.files.download(
-            sources=cfg.sources,
-            target=cfg.target,
-            flatten=cfg.flatten
-        )
+
+        result = await run_bioos(cfg.endpoint, ak, sk, call)
         
         sources_list = [cfg.sources] if isinstance(cfg.sources, str) else cfg.sources
         
@@ -897,7 +1163,7 @@ async def download_files_from_workspace(cfg: DownloadFilesConfig) -> Dict[str, A
         return {
             "success": False,
             "error": str(e),
-            "workspace_id": workspace_id if 'workspace_id' in locals() else None,
+            "workspace_id": workspace_id,
             "sources": cfg.sources if isinstance(cfg.sources, str) else list(cfg.sources),
             "target": str(cfg.target)
         }
@@ -905,21 +1171,29 @@ async def download_files_from_workspace(cfg: DownloadFilesConfig) -> Dict[str, A
 
 @mcp.tool(description="上传一个或多个本地文件到指定工作空间，支持重试、断点续传和跳过已存在文件")
 async def upload_files_to_workspace(cfg: UploadFilesConfig) -> Dict[str, Any]:
+    def call():
+        try:
+            return upload_local_files_to_workspace(
+                workspace_name=cfg.workspace_name,
+                sources=cfg.sources,
+                target=cfg.target,
+                flatten=cfg.flatten,
+                skip_existing=cfg.skip_existing,
+                checkpoint_dir=cfg.checkpoint_dir,
+                max_retries=cfg.max_retries,
+                task_num=cfg.task_num,
+                access_key=ak,
+                secret_key=sk,
+                endpoint=cfg.endpoint,
+            )
+        finally:
+            # 该函数内部会自行登录，登录缓存不再可靠；在工作线程中清除，避免等待登录锁阻塞事件循环
+            reset_login()
+
     try:
-        result = upload_local_files_to_workspace(
-            workspace_name=cfg.workspace_name,
-            sources=cfg.sources,
-            target=cfg.target,
-            flatten=cfg.flatten,
-            skip_existing=cfg.skip_existing,
-            checkpoint_dir=cfg.checkpoint_dir,
-            max_retries=cfg.max_retries,
-            task_num=cfg.task_num,
-            access_key=cfg.ak,
-            secret_key=cfg.sk,
-            endpoint=cfg.endpoint,
-        )
-        return result
+        ak, sk = get_credentials(cfg.ak, cfg.sk)
+        # 该函数内部会自行登录，同样需要在会话内执行，避免与其他凭证的调用交错
+        return await run_bioos(cfg.endpoint, ak, sk, call)
     except Exception as e:
         return {
             "success": False,
@@ -933,25 +1207,32 @@ async def create_workspace_bioos(cfg: BioosWorkspaceConfig) -> Dict[str, Any]:
     try:
         # 获取 ak、sk，用户输入优先于环境变量
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-
-        result = bioos.create_workspace(
-            name=cfg.workspace_name,
-            description=cfg.workspace_description
-        )
-        workspace_id = result.get("ID")
-        if not workspace_id:
-            return {"error": f"工作空间创建失败或未返回ID: {result}"}
 
-        # 绑定两种类型的集群
-        cluster_id = "default"
-        ws = bioos.Workspace(workspace_id)
-        
-        # 绑定 workflow 类型
-        workflow_bind_result = ws.bind_cluster(cluster_id=cluster_id, type_="workflow")
-        
-        # 绑定 webapp-ies 类型
-        webapp_bind_result = ws.bind_cluster(cluster_id=cluster_id, type_="webapp-ies")
+        def call():
+            result = bioos.create_workspace(
+                name=cfg.workspace_name,
+                description=cfg.workspace_description
+            )
+            workspace_id = result.get("ID")
+            if not workspace_id:
+                return {"error": f"工作空间创建失败或未返回ID: {result}"}
+            clear_workspace_ids()
+
+            # 绑定两种类型的集群
+            cluster_id = "default"
+            ws = bioos.Workspace(workspace_id)
+
+            # 在会话内并发绑定 workflow 与 webapp-ies 类型
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                binds = [pool.submit(ws.bind_cluster, cluster_id=cluster_id, type_=type_)
+                         for type_ in ("workflow", "webapp-ies")]
+                for bind in binds:
+                    bind.result()
+            return None
+
+        error = await run_bioos(cfg.endpoint, ak, sk, call)
+        if error:
+            return error
 
         return {
             "message": f"工作空间 '{cfg.workspace_name}' 创建并绑定集群成功"
@@ -964,16 +1245,19 @@ async def create_workspace_bioos(cfg: BioosWorkspaceConfig) -> Dict[str, Any]:
 async def list_workspace_members(cfg: ListWorkspaceMembersConfig) -> Dict[str, Any]:
     try:
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        workspace_id = get_workspace_id_by_name(cfg.workspace_name)
-        ws = bioos.workspace(workspace_id)
-        members = ws.list_members(
-            page_number=cfg.page_number,
-            page_size=cfg.page_size,
-            in_workspace=cfg.in_workspace,
-            roles=cfg.roles,
-            keyword=cfg.keyword,
-        )
+
+        def call():
+            workspace_id = get_workspace_id_by_name(cfg.workspace_name)
+            ws = bioos.workspace(workspace_id)
+            return workspace_id, ws.list_members(
+                page_number=cfg.page_number,
+                page_size=cfg.page_size,
+                in_workspace=cfg.in_workspace,
+                roles=cfg.roles,
+                keyword=cfg.keyword,
+            )
+
+        workspace_id, members = await run_bioos(cfg.endpoint, ak, sk, call)
         return {
             "success": True,
             "workspace_name": cfg.workspace_name,
@@ -989,10 +1273,12 @@ async def list_workspace_members(cfg: ListWorkspaceMembersConfig) -> Dict[str, A
 async def add_workspace_members(cfg: AddWorkspaceMembersConfig) -> Dict[str, Any]:
     try:
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        workspace_id = get_workspace_id_by_name(cfg.workspace_name)
-        ws = bioos.workspace(workspace_id)
-        result = ws.add_members(names=cfg.names, role=cfg.role)
+
+        def call():
+            workspace_id = get_workspace_id_by_name(cfg.workspace_name)
+            return workspace_id, bioos.workspace(workspace_id).add_members(names=cfg.names, role=cfg.role)
+
+        workspace_id, result = await run_bioos(cfg.endpoint, ak, sk, call)
         return {
             "success": True,
             "workspace_name": cfg.workspace_name,
@@ -1009,10 +1295,12 @@ async def add_workspace_members(cfg: AddWorkspaceMembersConfig) -> Dict[str, Any
 async def update_workspace_members(cfg: UpdateWorkspaceMembersConfig) -> Dict[str, Any]:
     try:
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        workspace_id = get_workspace_id_by_name(cfg.workspace_name)
-        ws = bioos.workspace(workspace_id)
-        result = ws.update_members(names=cfg.names, role=cfg.role)
+
+        def call():
+            workspace_id = get_workspace_id_by_name(cfg.workspace_name)
+            return workspace_id, bioos.workspace(workspace_id).update_members(names=cfg.names, role=cfg.role)
+
+        workspace_id, result = await run_bioos(cfg.endpoint, ak, sk, call)
         return {
             "success": True,
             "workspace_name": cfg.workspace_name,
@@ -1029,10 +1317,12 @@ async def update_workspace_members(cfg: UpdateWorkspaceMembersConfig) -> Dict[st
 async def delete_workspace_members(cfg: DeleteWorkspaceMembersConfig) -> Dict[str, Any]:
     try:
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        workspace_id = get_workspace_id_by_name(cfg.workspace_name)
-        ws = bioos.workspace(workspace_id)
-        result = ws.delete_members(names=cfg.names)
+
+        def call():
+            workspace_id = get_workspace_id_by_name(cfg.workspace_name)
+            return workspace_id, bioos.workspace(workspace_id).delete_members(names=cfg.names)
+
+        workspace_id, result = await run_bioos(cfg.endpoint, ak, sk, call)
         return {
             "success": True,
             "workspace_name": cfg.workspace_name,
@@ -1049,45 +1339,41 @@ async def export_bioos_workspace(cfg: BioosExportWorkspace) -> Dict[str, Any]:
     try:
         # 获取 ak、sk，用户输入优先于环境变量
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        workspace_id = get_workspace_id_by_name(cfg.workspace_name)
-        ws = bioos.Workspace(workspace_id)
-        result = ws.export_workspace_v2(
+        await run_bioos(cfg.endpoint, ak, sk, lambda: bioos.Workspace(
+            get_workspace_id_by_name(cfg.workspace_name)
+        ).export_workspace_v2(
             download_path=cfg.export_path,
             monitor=True,
             monitor_interval=5,
             max_retries=60
-        )
+        ))
         return {"message": f"Metadata exported successfully, location at {cfg.export_path}"}
     except Exception as e:
         return {"error": str(e)}
 
 @mcp.tool(description="在指定的workspace中新建一个 IES 实例，用户可在该 IES 实例上进行分析")
 async def create_iesapp(cfg: BioosCreateIesapp) -> Dict[str, Any]:
-    try:
-        ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        workspace_id = get_workspace_id_by_name(cfg.workspace_name)
-        ws = bioos.Workspace(workspace_id)
-        exists = ws.webinstanceapps.check_name_exists(cfg.ies_name)
-        if exists:
+    params = {
+        "name": cfg.ies_name,
+        "description": cfg.ies_desc,
+        "resource_size": cfg.ies_resource,
+        "storage_capacity": cfg.ies_storage,
+        "image": cfg.ies_image,
+        "ssh_enabled": cfg.ies_ssh,
+        "running_time_limit_seconds": cfg.ies_run_limit,
+        "idle_timeout_seconds": cfg.ies_idle_timeout,
+        "auto_start": cfg.ies_auto_start
+    }
+
+    def call():
+        ws = bioos.Workspace(get_workspace_id_by_name(cfg.workspace_name))
+        if ws.webinstanceapps.check_name_exists(cfg.ies_name):
             return {"error": "名称已存在，请先删除现有实例或使用不同的名称"}
-    except Exception as e:
-        return {"error": str(e)}
+        return ws.webinstanceapps.create_new_instance(**params)
+
     try:
-        params = {
-            "name": cfg.ies_name,
-            "description": cfg.ies_desc,
-            "resource_size": cfg.ies_resource,
-            "storage_capacity": cfg.ies_storage,
-            "image": cfg.ies_image,
-            "ssh_enabled": cfg.ies_ssh,
-            "running_time_limit_seconds": cfg.ies_run_limit,
-            "idle_timeout_seconds": cfg.ies_idle_timeout,
-            "auto_start": cfg.ies_auto_start
-        }
-        result = ws.webinstanceapps.create_new_instance(**params)
-        return result
+        ak, sk = get_credentials(cfg.ak, cfg.sk)
+        return await run_bioos(cfg.endpoint, ak, sk, call)
     except Exception as e:
         return {"error": str(e)}
 
@@ -1096,13 +1382,16 @@ async def create_iesapp(cfg: BioosCreateIesapp) -> Dict[str, Any]:
 async def check_ies_status(cfg: Check_iesapp_status) -> Dict[str, Any]:
     try:
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        workspace_id = get_workspace_id_by_name(cfg.workspace_name)
-        ws = bioos.Workspace(workspace_id)
-        app = ws.webinstanceapp(cfg.ies_name)
-        app.sync.__wrapped__(app)
-        if app.is_running():
-            ssh = app.get_ssh_connection_info()
+
+        def call():
+            ws = bioos.Workspace(get_workspace_id_by_name(cfg.workspace_name))
+            app = ws.webinstanceapp(cfg.ies_name)
+            app.sync.__wrapped__(app)
+            ssh = app.get_ssh_connection_info() if app.is_running() else None
+            return app, ssh
+
+        app, ssh = await run_bioos(cfg.endpoint, ak, sk, call)
+        if ssh is not None:
             return {
                 "state": "Running",
                 "ready": True,
@@ -1123,11 +1412,9 @@ async def check_ies_status(cfg: Check_iesapp_status) -> Dict[str, Any]:
 async def get_ies_events(cfg: GetIesEvents) -> Dict[str, Any]:
     try:
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        workspace_id = get_workspace_id_by_name(cfg.workspace_name)
-        ws = bioos.Workspace(workspace_id)
-        app = ws.webinstanceapp(cfg.ies_name)
-        events = app.get_events()
+        events = await run_bioos(cfg.endpoint, ak, sk, lambda: bioos.Workspace(
+            get_workspace_id_by_name(cfg.workspace_name)
+        ).webinstanceapp(cfg.ies_name).get_events())
         return {"events": events}
     except Exception as e:
         return {"error": str(e)}
@@ -1151,23 +1438,25 @@ async def upload_dashboard_file(cfg: BioosS3FileUploader) -> Dict[str, Any]:
         if filename != "__dashboard__.md":
             return {"error": f"文件名必须为__dashboard__.md，当前文件名: {filename}"}
 
-        # 登录Bio-OS
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
+        def call():
+            # 获取工作空间
+            workspace_id = get_workspace_id_by_name(cfg.workspace_name)
+            ws = bioos.workspace(workspace_id)
 
-        # 获取工作空间
-        workspace_id = get_workspace_id_by_name(cfg.workspace_name)
-        ws = bioos.workspace(workspace_id)
+            # 上传文件到根目录
+            upload_result = ws.files.upload(
+                sources=[cfg.local_file_path],
+                target="",  # 上传到根目录
+                flatten=True
+            )
+            # 获取S3 URL
+            s3_url = ws.files.s3_urls(["__dashboard__.md"])[0] if upload_result else None
+            return workspace_id, upload_result, s3_url
 
-        # 上传文件到根目录
-        upload_result = ws.files.upload(
-            sources=[cfg.local_file_path],
-            target="",  # 上传到根目录
-            flatten=True
-        )
+        # 登录Bio-OS 并上传
+        workspace_id, upload_result, s3_url = await run_bioos(cfg.endpoint, ak, sk, call)
 
         if upload_result:
-            # 获取S3 URL
-            s3_url = ws.files.s3_urls(["__dashboard__.md"])[0]
             expected_s3_url = f"s3://bioos-{workspace_id}/__dashboard__.md"
 
             return {
@@ -1189,8 +1478,8 @@ async def upload_dashboard_file(cfg: BioosS3FileUploader) -> Dict[str, Any]:
 async def get_asset_usage_data(cfg: AssetUsageConfig) -> Dict[str, Any]:
     try:
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        result = bioos.usage().get_asset_usage_data(cfg.start_time, cfg.end_time, cfg.type)
+        result = await run_bioos(cfg.endpoint, ak, sk,
+                                 lambda: bioos.usage().get_asset_usage_data(cfg.start_time, cfg.end_time, cfg.type))
         return {
             "success": True,
             "start_time": cfg.start_time,
@@ -1206,8 +1495,8 @@ async def get_asset_usage_data(cfg: AssetUsageConfig) -> Dict[str, Any]:
 async def list_asset_usage(cfg: AssetUsageConfig) -> Dict[str, Any]:
     try:
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        result = bioos.usage().list_asset_usage(cfg.start_time, cfg.end_time, cfg.type)
+        result = await run_bioos(cfg.endpoint, ak, sk,
+                                 lambda: bioos.usage().list_asset_usage(cfg.start_time, cfg.end_time, cfg.type))
         return {
             "success": True,
             "start_time": cfg.start_time,
@@ -1223,8 +1512,8 @@ async def list_asset_usage(cfg: AssetUsageConfig) -> Dict[str, Any]:
 async def get_total_asset_usage(cfg: AssetUsageConfig) -> Dict[str, Any]:
     try:
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        result = bioos.usage().get_total_asset_usage(cfg.start_time, cfg.end_time, cfg.type)
+        result = await run_bioos(cfg.endpoint, ak, sk,
+                                 lambda: bioos.usage().get_total_asset_usage(cfg.start_time, cfg.end_time, cfg.type))
         return {
             "success": True,
             "start_time": cfg.start_time,
@@ -1240,13 +1529,12 @@ async def get_total_asset_usage(cfg: AssetUsageConfig) -> Dict[str, Any]:
 async def get_resource_usage_data(cfg: ResourceUsageDataConfig) -> Dict[str, Any]:
     try:
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        result = bioos.usage().get_resource_usage_data(
+        result = await run_bioos(cfg.endpoint, ak, sk, lambda: bioos.usage().get_resource_usage_data(
             cfg.start_time,
             cfg.end_time,
             cfg.type,
             sub_dimensions=cfg.sub_dimensions,
-        )
+        ))
         return {
             "success": True,
             "start_time": cfg.start_time,
@@ -1263,8 +1551,8 @@ async def get_resource_usage_data(cfg: ResourceUsageDataConfig) -> Dict[str, Any
 async def list_workspace_resource_usage(cfg: ResourceUsageListConfig) -> Dict[str, Any]:
     try:
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        result = bioos.usage().list_workspace_resource_usage(cfg.start_time, cfg.end_time)
+        result = await run_bioos(cfg.endpoint, ak, sk,
+                                 lambda: bioos.usage().list_workspace_resource_usage(cfg.start_time, cfg.end_time))
         return {
             "success": True,
             "start_time": cfg.start_time,
@@ -1279,8 +1567,8 @@ async def list_workspace_resource_usage(cfg: ResourceUsageListConfig) -> Dict[st
 async def list_user_resource_usage(cfg: ResourceUsageListConfig) -> Dict[str, Any]:
     try:
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        result = bioos.usage().list_user_resource_usage(cfg.start_time, cfg.end_time)
+        result = await run_bioos(cfg.endpoint, ak, sk,
+                                 lambda: bioos.usage().list_user_resource_usage(cfg.start_time, cfg.end_time))
         return {
             "success": True,
             "start_time": cfg.start_time,
@@ -1295,8 +1583,8 @@ async def list_user_resource_usage(cfg: ResourceUsageListConfig) -> Dict[str, An
 async def get_total_resource_usage(cfg: ResourceUsageListConfig) -> Dict[str, Any]:
     try:
         ak, sk = get_credentials(cfg.ak, cfg.sk)
-        bioos.login(endpoint=cfg.endpoint, access_key=ak, secret_key=sk)
-        result = bioos.usage().get_total_resource_usage(cfg.start_time, cfg.end_time)
+        result = await run_bioos(cfg.endpoint, ak, sk,
+                                 lambda: bioos.usage().get_total_resource_usage(cfg.start_time, cfg.end_time))
         return {
             "success": True,
             "start_time": cfg.start_time,
@@ -1308,6 +1596,41 @@ async def get_total_resource_usage(cfg: ResourceUsageListConfig) -> Dict[str, An
 
 
 # ===== Dockstore Tools =====
+# 进行中的 Dockstore 检索与重排：参数相同的并发调用共用同一次 HTTP 请求
+_INFLIGHT_SEARCHES: Dict[str, asyncio.Future] = {}
+_INFLIGHT_RERANKS: Dict[Tuple, asyncio.Future] = {}
+
+
+async def rerank_in_batches(query: str, texts: List[str], top_n: int) -> List[Dict[str, Any]]:
+    """按长度分批后在 RERANK_EXECUTOR 上并发发送各批重排请求，再合并分数
+
+    各批请求直接提交到同一个线程池，不在池内线程中再嵌套线程池；
+    分数跨批比较的前提见 RerankClient.merge_batches。
+    """
+    reranker = get_reranker()
+    loop = asyncio.get_running_loop()
+    if len(texts) <= RERANK_BATCH_SIZE:
+        return await loop.run_in_executor(RERANK_EXECUTOR, reranker.rerank, query, texts, top_n)
+    batches = reranker.length_batches(texts, RERANK_BATCH_SIZE)
+    batch_scores = await asyncio.gather(*(
+        loop.run_in_executor(RERANK_EXECUTOR, reranker.score, query, [texts[i] for i in batch])
+        for batch in batches
+    ))
+    return reranker.merge_batches(texts, batches, list(batch_scores), top_n)
+
+
+async def coalesced_dockstore_search(queries: List[Dict[str, Any]], sentence: bool,
+                                     query_type: str) -> Optional[Dict[str, Any]]:
+    """合并并发的相同检索请求，返回 DockstoreSearch.search 的结果"""
+    key = json.dumps([queries, sentence, query_type], sort_keys=True)
+
+    async def search():
+        async with DOCKSTORE_CONCURRENCY:
+            return await DOCKSTORE_CLIENT.search(queries, sentence, query_type)
+
+    return await join_inflight(_INFLIGHT_SEARCHES, key, search)
+
+
 @mcp.tool()
 async def search_dockstore(config: DockstoreSearchConfig) -> Dict[str, Any]:
     """
@@ -1318,19 +1641,22 @@ async def search_dockstore(config: DockstoreSearchConfig) -> Dict[str, Any]:
             return {"error": "配置对象缺少合法 'query' 列表"}
 
         #构造 ES 查询
-        client = DockstoreSearch()
-        queries = []
-        for item in config.query:
-            if isinstance(item, list) and len(item) == 3:
-                field, operator, term = item
-                queries.append({"terms": [term], "fields": [field],
-                                "operator": operator if operator in ("AND", "OR") else "AND"})
+        client = DOCKSTORE_CLIENT
+        # query 元素类型已由 Pydantic 校验，解包时顺带检查长度
+        try:
+            queries = [
+                {"terms": [term], "fields": [field],
+                 "operator": operator if operator in QUERY_OPERATORS else "AND"}
+                for field, operator, term in config.query
+            ]
+        except ValueError:
+            return {"error": "每个 query 项必须是 [field, match_type, term] 三元素列表"}
         if not queries:
             return {"error": "没有有效的查询条件"}
 
         try:
             results = await asyncio.wait_for(
-                client.search(queries, config.sentence, config.query_type),
+                coalesced_dockstore_search(queries, config.sentence, config.query_type),
                 timeout=60
             )
         except asyncio.TimeoutError:
@@ -1339,42 +1665,53 @@ async def search_dockstore(config: DockstoreSearchConfig) -> Dict[str, Any]:
         hits = results.get("hits", {}).get("hits", [])
         if not hits:
             return {"error": "未找到匹配的工作流"}
-
-        texts = [
-            f"{h['_source'].get('workflowName') or h['_source'].get('name')} — "
-            f"{h['_source'].get('description', '')}"
-            for h in hits
-        ]
-        # 把用户关键词拼成一句自然查询
-        user_query = " ".join(term for q in config.query for term in (q[2],))
-
-        loop = asyncio.get_running_loop()
-        try:
-            reranked = await loop.run_in_executor(
-                None,
-                functools.partial(RERANKER.rerank,
-                                  query=user_query,
-                                  texts=texts,
-                                  top_n=config.top_n)
-            )
-        except RuntimeError as e:
-            # 若重排失败，降级用 ES 原排序
-            print(f"[WARN] Rerank 失败，降级为 ES 排序: {e}")
+        # 只对 ES 排序靠前的 K 条做重排，重排开销不随命中数增长
+        hits = hits[:config.rerank_top_k]
+
+        # 单个 AND 条件且只有一个词时，ES 排序已足够，跳过重排；
+        # 命中数不超过 top_n 时所有命中都会入选，重排也不改变结果
+        is_literal = (
+            len(queries) == 1
+            and queries[0]["operator"] == "AND"
+            and len(queries[0]["terms"][0].split()) <= 1
+        )
+        if is_literal or len(hits) <= config.top_n:
             reranked = [{"index": i, "score": h["_score"]} for i, h in enumerate(hits[:config.top_n])]
+        else:
+            # 每条命中只取一次 _source
+            texts = []
+            for h in hits:
+                source = h["_source"]
+                name = source.get("workflowName") or source.get("name") or ""
+                desc = source.get("description") or ""
+                texts.append(name + " — " + desc)
+            # 把用户关键词拼成一句自然查询（只取有效的查询条件）
+            user_query = " ".join(q["terms"][0] for q in queries)
+
+            # 相同关键词与命中集合的重排结果短时间内直接复用
+            cache_key = (user_query, tuple(h.get("_id") for h in hits), config.top_n)
+            reranked = RERANK_CACHE.get(cache_key)
+            if reranked is None:
+                try:
+                    # 缓存未命中时，同一时刻相同的重排请求只发送一次
+                    reranked = await join_inflight(
+                        _INFLIGHT_RERANKS, cache_key,
+                        lambda: rerank_in_batches(user_query, texts, config.top_n)
+                    )
+                    RERANK_CACHE.set(cache_key, reranked)
+                except RuntimeError as e:
+                    # 若重排失败，降级用 ES 原排序
+                    logger.warning("Rerank 失败，降级为 ES 排序: %s", e)
+                    reranked = [{"index": i, "score": h["_score"]} for i, h in enumerate(hits[:config.top_n])]
 
         # ---------- 5. 取回 top_n hits ----------
         top_hits = [hits[item["index"]] for item in reranked]
-        top_results = {"hits": {"total": {"value": len(top_hits)}, "hits": top_hits}}
-
-
-        markdown = client.format_results(top_results, output_full=False)
-        pattern = re.compile(r"- \[(.*?)\]\((.*?)\)")
-        result_map = {match[0]: match[1] for match in pattern.findall(markdown)}
+        # 直接从 _source 取名称与链接，不再生成并回解析 markdown
+        result_map = client.workflow_links(top_hits)
 
         return {"results": result_map}
 
     except Exception as e:
-        import traceback
         return {"error": f"搜索失败: {e}\n{traceback.format_exc()}"}
 
 
@@ -1384,11 +1721,10 @@ async def fetch_wdl_from_dockstore(
     """
     从Dockstore下载工作流
     """
-    # Create downloader client
-    downloader = DockstoreDownloader()
+    downloader = DOCKSTORE_DOWNLOADER
 
     try:
-        # 使用新的 URL 解析和下载方法
+        # 使用新的 URL 解析和下载方法；并发上限由下载客户端按请求控制
         success = await downloader.download_workflow_from_url(
             config.url, config.output_path)
 
@@ -1400,22 +1736,11 @@ async def fetch_wdl_from_dockstore(
         if not org or not workflow_name:
             return {"error": "无法从 URL 解析组织和工作流名称"}
 
-        save_dir = Path(config.output_path) / f"{org}_{workflow_name}"
-
-        # 获取已下载的文件列表
-        all_files = []
-        for root, _, filenames in os.walk(save_dir):
-            for filename in filenames:
-                file_path = Path(root) / filename
-                all_files.append(str(file_path.resolve()))
+        # 只解析一次，后续文件路径都在其基础上直接拼接
+        save_dir = (Path(config.output_path) / f"{org}_{workflow_name}").resolve()
 
-        # 自动检测 wdl 所在目录（不含子目录，且至少含一个 .wdl 文件）
-        wdl_dirs = []
-        for root, dirs, files in os.walk(save_dir):
-            if dirs:
-                continue  # 跳过有子目录的
-            if any(file.endswith(".wdl") for file in files):
-                wdl_dirs.append(Path(root).resolve())
+        # 单次遍历获取已下载的文件列表，并检测 wdl 所在目录（不含子目录，且至少含一个 .wdl 文件）
+        all_files, wdl_dirs = scan_workflow_dir(save_dir)
 
         if not wdl_dirs:
             return {"error": "未找到包含 WDL 文件的目录"}
@@ -1425,52 +1750,102 @@ async def fetch_wdl_from_dockstore(
 
         return {
             "success": True,
-            "save_directory": str(save_dir.resolve()),
+            "save_directory": str(save_dir),
             "organization": org,
             "workflow_name": workflow_name,
             "files": all_files,
             "wdl_save_directory": str(wdl_save_dir)
         }
     except Exception as e:
-        import traceback
         return {"error": f"下载过程中发生错误: {str(e)}\n{traceback.format_exc()}"}
 
 
+def format_docker_image_url(config: DockerBuildConfig) -> str:
+    """拼接 Docker 镜像的完整 URL"""
+    return f"{config.registry}/{config.namespace_name}/{config.repo_name}:{config.tag}"
+
+
 @mcp.tool()
 async def get_docker_image_url(config: DockerBuildConfig) -> str:
     """获取 Docker 镜像的完整 URL"""
-    return f"{config.registry}/{config.namespace_name}/{config.repo_name}:{config.tag}"
+    return format_docker_image_url(config)
+
+
+DEFAULT_BUILD_PARALLELISM = 4
+
+
+def read_build_parallelism() -> int:
+    """读取 BIOOS_BUILD_PARALLELISM，非整数时回退到默认值，且至少为 1"""
+    raw = os.getenv("BIOOS_BUILD_PARALLELISM")
+    if raw is None:
+        return DEFAULT_BUILD_PARALLELISM
+    try:
+        value = int(raw)
+    except ValueError:
+        logger.warning("BIOOS_BUILD_PARALLELISM=%r 不是整数，使用默认值 %d", raw, DEFAULT_BUILD_PARALLELISM)
+        return DEFAULT_BUILD_PARALLELISM
+    return max(1, value)
+
+
+# 同时向构建服务上传的镜像构建任务上限，可通过环境变量 BIOOS_BUILD_PARALLELISM 调整
+BUILD_PARALLELISM = read_build_parallelism()
+BUILD_CONCURRENCY = asyncio.Semaphore(BUILD_PARALLELISM)
+# 进行中的构建状态查询：task_id -> 共享的 HTTP 请求
+_INFLIGHT_BUILD_STATUS: Dict[str, asyncio.Future] = {}
 
 
 @mcp.tool()
 async def build_docker_image(config: DockerBuildConfig) -> Dict[str, str]:
     """构建 Docker 镜像"""
-    with open(config.source_path, "rb") as f:
-        files = {"Source": f}
-        data = {
-            "Registry": config.registry,
-            "NamespaceName": config.namespace_name,
-            "RepoName": config.repo_name,
-            "ToTag": config.tag
-        }
+    data = {
+        "Registry": config.registry,
+        "NamespaceName": config.namespace_name,
+        "RepoName": config.repo_name,
+        "ToTag": config.tag
+    }
+
+    if BUILD_CONCURRENCY.locked():
+        logger.info("构建并发已满（上限 %d），%s:%s 排队等待", BUILD_PARALLELISM,
+                    config.repo_name, config.tag)
+    async with BUILD_CONCURRENCY:
+        # httpx 按块读取文件并异步上传，不阻塞事件循环，也不把构建上下文整体读入内存
+        with open(config.source_path, "rb") as f:
+            files = {"Source": (os.path.basename(config.source_path), f, "application/octet-stream")}
+            response = await DOCKER_BUILD_CLIENT.post("/build", files=files, data=data)
+
+    result = response.json()
+    result["ImageURL"] = format_docker_image_url(config)
+    return result
 
-        # 移除 timeout 参数
-        response = requests.post("http://10.20.16.38:3001/build",
-                                 files=files,
-                                 data=data)
 
-        result = response.json()
-        result["ImageURL"] = await get_docker_image_url(config)
-        return result
+@mcp.tool()
+async def build_docker_images(configs: List[DockerBuildConfig],
+                              max_parallel: Optional[int] = None) -> List[Dict[str, Any]]:
+    """批量构建多个 Docker 镜像，结果顺序与 configs 一致，单个失败不影响其余构建
+
+    并发数不超过 BIOOS_BUILD_PARALLELISM，max_parallel 可进一步调低本次调用的并发。
+    """
+    limit = BUILD_PARALLELISM if max_parallel is None else max(1, min(max_parallel, BUILD_PARALLELISM))
+    semaphore = asyncio.Semaphore(limit)
+
+    async def build_one(cfg: DockerBuildConfig) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return await build_docker_image(cfg)
+            except Exception as e:
+                return {"error": f"构建提交失败：{e}", "ImageURL": format_docker_image_url(cfg)}
+
+    return list(await asyncio.gather(*(build_one(cfg) for cfg in configs)))
 
 
 @mcp.tool()
 async def check_build_status(task_id: str) -> Dict[str, Any]:
     """检查 Docker 镜像构建状态"""
-    # 移除 timeout 参数
-    response = requests.get(f"http://10.20.16.38:3001/build/status/{task_id}")
-    return response.json()
+    async def fetch() -> Dict[str, Any]:
+        response = await DOCKER_BUILD_CLIENT.get(f"/build/status/{task_id}")
+        return response.json()
 
+    return await join_inflight(_INFLIGHT_BUILD_STATUS, task_id, fetch)
 
 if __name__ == "__main__":
     print("mcp running")
@@ -1478,4 +1853,10 @@ if __name__ == "__main__":
         load_miracle_env_from_parent_proc()
     except Exception as e:
         print(f"Warning: failed to load parent MIRACLE env: {e}")
+    # 安装了 uvloop 时使用其事件循环，mcp.run 内部通过 anyio 新建的循环会沿用该策略
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     mcp.run()
@@ -0,0 +1,154 @@
+# bioos_mcp/tools/bioos_session.py
+"""
+Bio-OS 凭证、登录状态与工作空间 ID 缓存
+
+bioos.login 会发起一次鉴权请求，并把客户端保存在 SDK 的全局状态中。
+这里记录最近一次登录使用的 (endpoint, ak, sk)，凭证相同且未过期时直接复用，凭证切换时重新登录。
+全局客户端为进程内共享，调用方需在 bioos_session 内完成登录与后续 SDK 调用：
+同一凭证的会话可以并行，不同凭证的会话依次进行，避免中途被其他调用方切换登录。
+工作空间名称到 ID 的映射同样按登录凭证缓存，避免每次调用都列出全部工作空间。
+环境变量中的 ak、sk 在导入时读取一次，加载父进程环境后通过 refresh_env_credentials 刷新。
+"""
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from bioos import bioos
+
+# 登录状态有效期（秒）
+LOGIN_TTL = 600
+
+_login_lock = threading.Lock()
+_current_login: Optional[Tuple[Tuple[str, str, str], float]] = None
+# 登录凭证 -> (工作空间名称 -> ID, 缓存时间)
+_workspace_ids: Dict[Tuple[str, str, str], Tuple[Dict[str, str], float]] = {}
+
+# 当前会话使用的凭证、持有会话的调用数，以及按凭证统计的等待数
+_session_cond = threading.Condition()
+_session_key: Optional[Tuple[str, str, str]] = None
+_session_users = 0
+_session_waiting: Counter = Counter()
+
+
+_env_ak: Optional[str] = None
+_env_sk: Optional[str] = None
+
+
+def refresh_env_credentials() -> None:
+    """重新读取环境变量 MIRACLE_ACCESS_KEY / MIRACLE_SECRET_KEY"""
+    global _env_ak, _env_sk
+    _env_ak = os.getenv("MIRACLE_ACCESS_KEY")
+    _env_sk = os.getenv("MIRACLE_SECRET_KEY")
+
+
+refresh_env_credentials()
+
+
+def get_credentials(user_ak: Optional[str] = None, user_sk: Optional[str] = None) -> Tuple[str, str]:
+    """获取 ak、sk，用户输入优先于环境变量"""
+    ak = user_ak if user_ak is not None else _env_ak
+    sk = user_sk if user_sk is not None else _env_sk
+
+    if not ak:
+        raise ValueError("未提供 MIRACLE_ACCESS_KEY，请设置环境变量 'MIRACLE_ACCESS_KEY' 或在参数中指定")
+    if not sk:
+        raise ValueError("未提供 MIRACLE_SECRET_KEY，请设置环境变量 'MIRACLE_SECRET_KEY' 或在参数中指定")
+
+    return ak, sk
+
+
+def ensure_login(endpoint: str, ak: str, sk: str) -> None:
+    """按需登录 Bio-OS，同一凭证在 LOGIN_TTL 内只鉴权一次"""
+    global _current_login
+    key = (endpoint, ak, sk)
+    with _login_lock:
+        now = time.monotonic()
+        if _current_login is not None:
+            last_key, logged_at = _current_login
+            if last_key == key and now - logged_at < LOGIN_TTL:
+                return
+        _current_login = None
+        bioos.login(endpoint=endpoint, access_key=ak, secret_key=sk)
+        _current_login = (key, now)
+
+
+def _can_enter_session(key: Tuple[str, str, str]) -> bool:
+    """没有会话时可直接进入；凭证相同且没有其他凭证在等待时可加入当前会话"""
+    if _session_users == 0:
+        return True
+    waiting_others = sum(_session_waiting.values()) - _session_waiting[key]
+    return key == _session_key and waiting_others == 0
+
+
+@contextmanager
+def bioos_session(endpoint: str, ak: str, sk: str) -> Iterator[None]:
+    """在会话内按需登录并执行 SDK 调用，期间全局客户端不会被切换到其他凭证
+
+    同步阻塞，需在工作线程中调用。
+    """
+    global _session_key, _session_users
+    key = (endpoint, ak, sk)
+    with _session_cond:
+        if not _can_enter_session(key):
+            _session_waiting[key] += 1
+            try:
+                _session_cond.wait_for(lambda: _can_enter_session(key))
+            finally:
+                _session_waiting[key] -= 1
+                if not _session_waiting[key]:
+                    del _session_waiting[key]
+                # 等待数变化后，同一凭证的其他等待者可能也可以加入
+                _session_cond.notify_all()
+        _session_key = key
+        _session_users += 1
+    try:
+        ensure_login(endpoint, ak, sk)
+        yield
+    finally:
+        with _session_cond:
+            _session_users -= 1
+            _session_cond.notify_all()
+
+
+def reset_login() -> None:
+    """清除登录缓存，下次调用 ensure_login 时重新鉴权"""
+    global _current_login
+    with _login_lock:
+        _current_login = None
+
+
+def get_workspace_id(workspace_name: str) -> str:
+    """根据工作空间名称解析 ID，需在 bioos_session 内调用
+
+    名称不在缓存中时重新拉取一次工作空间列表，以便识别新建的工作空间。
+    """
+    with _session_cond:
+        key = _session_key if _session_users else None
+
+    now = time.monotonic()
+    cached = _workspace_ids.get(key) if key is not None else None
+    if cached is not None and now - cached[1] < LOGIN_TTL:
+        workspace_id = cached[0].get(workspace_name)
+        if workspace_id is not None:
+            return workspace_id
+
+    workspaces = bioos.list_workspaces()
+    name_to_id: Dict[str, str] = {}
+    if not getattr(workspaces, "empty", True):
+        # 同名时保留第一条，与原先 DataFrame 查询取 iloc[0] 一致
+        for name, ws_id in zip(workspaces["Name"], workspaces["ID"]):
+            name_to_id.setdefault(str(name), str(ws_id))
+    if key is not None:
+        _workspace_ids[key] = (name_to_id, now)
+
+    if workspace_name not in name_to_id:
+        raise ValueError(f"未找到工作空间：{workspace_name}")
+    return name_to_id[workspace_name]
+
+
+def clear_workspace_ids() -> None:
+    """清除工作空间 ID 缓存，在创建或删除工作空间后调用"""
+    _workspace_ids.clear()
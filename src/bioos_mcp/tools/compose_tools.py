@@ -1,7 +1,29 @@
 # bioos_mcp/tools/compose_tools.py
 import json, re
+from pathlib import Path
 from typing import Any, Dict, List, Set, Tuple
 
+try:  # orjson 为可选依赖，缺失时回退到标准库 json
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# ---------- 0. JSON 读写 -----------------------------------------------
+def load_json(path: str) -> Any:
+    """读取 JSON 文件，优先使用 orjson"""
+    raw = Path(path).read_bytes()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def dump_json(obj: Any) -> bytes:
+    """序列化为缩进 2 空格的 UTF-8 JSON 字节串，优先使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
 
 # ---------- 1. 解析 (optional [, default = xxx]) -----------------------
 _OPT_RE = re.compile(
@@ -96,15 +118,18 @@ def build_inputs(template_path: str, samples: List[Dict[str, Any]]):
     """
     读模板 → 批量填充 → 返回 (filled_samples, error_msg)
     """
-    with open(template_path, "r") as f:
-        tpl = json.load(f)
+    tpl = load_json(template_path)
 
     req, opt_def, opt_nodef = classify(tpl)
     tkeys = set(tpl)
 
     filled_all, all_errs = [], []
+    # 单样本复制出的多个样本是同一个 dict 对象，按对象只填充一次
+    done: Dict[int, Tuple[Dict[str, Any], List[str]]] = {}
     for idx, s in enumerate(samples, 1):
-        filled, errs = fill_one_sample(s, req, opt_def, opt_nodef, tkeys)
+        if id(s) not in done:
+            done[id(s)] = fill_one_sample(s, req, opt_def, opt_nodef, tkeys)
+        filled, errs = done[id(s)]
         if errs:
             all_errs.append(f"样本 #{idx}:\n" + "\n".join(errs))
         filled_all.append(filled)
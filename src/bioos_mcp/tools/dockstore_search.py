@@ -78,8 +78,17 @@ import argparse
 import asyncio
 import httpx
 import json
+import logging
 import os
 
+# 检索过程的调试信息只在启用 DEBUG 级别时输出
+logger = logging.getLogger(__name__)
+
+
+async def add_request_id(request: httpx.Request) -> None:
+    """httpx 请求钩子：为每个请求生成独立的 X-Request-ID，Dockstore 检索与下载客户端共用"""
+    request.headers["X-Request-ID"] = str(uuid4())
+
 
 class DockstoreSearch:
     """Dockstore search client for querying workflows using Elasticsearch."""
@@ -109,12 +118,13 @@ class DockstoreSearch:
             "Sec-Fetch-Site": "same-origin",
             "User-Agent": self.USER_AGENT,
             "X-Dockstore-UI": "",
-            "X-Request-ID": str(uuid4()),
             "X-Session-ID": str(uuid4()),
             "sec-ch-ua": '"Google Chrome";v="131", "Chromium";v="131", "Not_A Brand";v="24"',
             "sec-ch-ua-mobile": "?0",
             "sec-ch-ua-platform": '"Windows"'
         }
+        # 同一实例的各次请求复用连接
+        self.client = httpx.AsyncClient(timeout=30.0, event_hooks={"request": [add_request_id]})
 
     def get_direct_search_body(self, descriptor_type=None) -> Dict[str, Any]:
         """构建精确匹配curl请求的搜索体。"""
@@ -225,20 +235,19 @@ class DockstoreSearch:
             request_body_str = json.dumps(search_body)
             print(f"请求体: {request_body_str}")
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                print(f"正在发送请求到 {self.search_url}")
-                response = await client.post(
-                    self.search_url,
-                    headers=self.headers,
-                    content=request_body_str  # 使用 content 字符串
-                )
-                print(f"请求完成, 状态码: {response.status_code}")
+            print(f"正在发送请求到 {self.search_url}")
+            response = await self.client.post(
+                self.search_url,
+                headers=self.headers,
+                content=request_body_str  # 使用 content 字符串
+            )
+            print(f"请求完成, 状态码: {response.status_code}")
+            
+            if response.status_code != 200:
+                print(f"错误响应: {response.text}")
+                return None
                 
-                if response.status_code != 200:
-                    print(f"错误响应: {response.text}")
-                    return None
-                    
-                return response.json()
+            return response.json()
         except Exception as e:
             print(f"直接搜索过程中发生错误: {str(e)}")
             import traceback
@@ -256,7 +265,7 @@ class DockstoreSearch:
     ) -> Optional[Dict[str, Any]] :
         """Execute workflow search with minimal request body."""
         try:
-            print(f"开始构建搜索查询: {queries}")
+            logger.debug("开始构建搜索查询: %s", queries)
             search_body = self._build_search_body(
                 queries, 
                 is_sentence, 
@@ -265,49 +274,56 @@ class DockstoreSearch:
                 verified_only,
                 include_archived
             )
-            print(f"搜索体构建完成, 准备发送请求")
+            logger.debug("搜索体构建完成, 准备发送请求")
             
-            # 调试输出
             request_body_str = json.dumps(search_body)
-            print(f"请求体: {request_body_str}")
+            logger.debug("请求体: %s", request_body_str)
+            
+            logger.debug("正在发送请求到 %s", self.search_url)
+            response = await self.client.post(
+                self.search_url,
+                headers=self.headers,
+                content=request_body_str  # 使用 content 字符串
+            )
+            logger.debug("请求完成, 状态码: %s", response.status_code)
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                print(f"正在发送请求到 {self.search_url}")
-                response = await client.post(
-                    self.search_url,
-                    headers=self.headers,
-                    content=request_body_str  # 使用 content 字符串
-                )
-                print(f"请求完成, 状态码: {response.status_code}")
+            if response.status_code != 200:
+                logger.warning("错误响应: %s", response.text)
+                return None
                 
-                if response.status_code != 200:
-                    print(f"错误响应: {response.text}")
-                    return None
-                    
-                result = response.json()
+            result = response.json()
+            
+            # 检查结果是否有效
+            if not result or not isinstance(result, dict):
+                logger.warning("返回了无效的结果格式: %s", result)
+                return None
                 
-                # 检查结果是否有效
-                if not result or not isinstance(result, dict):
-                    print(f"返回了无效的结果格式: {result}")
-                    return None
-                    
-                # 检查hits是否存在，以及是否包含任何结果
-                if "hits" not in result or not result["hits"] or not result["hits"].get("hits"):
-                    print(f"查询 '{queries}' 没有找到匹配结果")
-                    # 返回空结果结构而不是None，这样可以在后续处理中正确识别为"没有结果"
-                    return {"hits": {"total": {"value": 0}, "hits": []}}
-                    
-                # 打印结果计数
-                hits_count = len(result["hits"].get("hits", []))
-                print(f"查询返回了 {hits_count} 个结果")
+            # 检查hits是否存在，以及是否包含任何结果
+            if "hits" not in result or not result["hits"] or not result["hits"].get("hits"):
+                logger.debug("查询 '%s' 没有找到匹配结果", queries)
+                # 返回空结果结构而不是None，这样可以在后续处理中正确识别为"没有结果"
+                return {"hits": {"total": {"value": 0}, "hits": []}}
                 
-                return result
+            logger.debug("查询返回了 %d 个结果", len(result["hits"]["hits"]))
+            
+            return result
         except Exception as e:
-            print(f"搜索过程中发生错误: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("搜索过程中发生错误: %s", e)
             return None
 
+    def workflow_links(self, hits: List[Dict[str, Any]], limit: int = 5) -> Dict[str, str]:
+        """Map workflow names to Dockstore URLs, same entries as format_results without building markdown."""
+        ranked = sorted(hits, key=lambda hit: hit.get("_score", 0), reverse=True)
+        links = {}
+        for hit in ranked[:limit]:
+            source = hit.get("_source", {})
+            name = (source.get('workflowName') or
+                    source.get('name') or
+                    source.get('repository') or
+                    '未命名工作流')
+            links[name] = f"https://dockstore.miracle.ac.cn/workflows/{source.get('full_workflow_path', '')}"
+        return links
+
     def format_results(self, results: dict, output_full: bool = False) -> Union[str, List[str]] :
         """Format search results as a concise list of links with enhanced information."""
         # 检查结果是否为空或无效
@@ -34,7 +34,8 @@ import datetime
 from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 from urllib.parse import urlparse
-from uuid import uuid4
+
+from bioos_mcp.tools.dockstore_search import add_request_id
 
 
 class DockstoreDownloader:
@@ -47,15 +48,27 @@ class DockstoreDownloader:
         "Chrome/131.0.0.0 Safari/537.36"
     )
 
-    def __init__(self) -> None:
-        """Initialize the DockstoreDownloader client."""
+    def __init__(self, request_limit: Optional[asyncio.Semaphore] = None) -> None:
+        """Initialize the DockstoreDownloader client.
+
+        request_limit 用于限制同时发往 Dockstore 的请求数，按单次 HTTP 请求占用。
+        """
         self.headers = {
             "Accept": "application/json",
             "Accept-Language": "zh-CN,zh;q=0.9",
             "Connection": "keep-alive",
             "User-Agent": self.USER_AGENT,
-            "X-Request-ID": str(uuid4()),
         }
+        # 元数据与各个描述文件的下载共用一个连接池
+        self.client = httpx.AsyncClient(timeout=30.0, event_hooks={"request": [add_request_id]})
+        self.request_limit = request_limit
+
+    async def _get(self, url: str) -> httpx.Response:
+        """发送 GET 请求；设置了 request_limit 时只在请求期间占用一个名额"""
+        if self.request_limit is None:
+            return await self.client.get(url, headers=self.headers)
+        async with self.request_limit:
+            return await self.client.get(url, headers=self.headers)
     
     @staticmethod
     def parse_workflow_url(url: str) -> Tuple[Optional[str], Optional[str]]:
@@ -105,18 +118,17 @@ class DockstoreDownloader:
         print(f"查询组织 {organization} 的已发布工作流")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, headers=self.headers)
-                
-                if response.status_code != 200:
-                    print(f"查询已发布工作流失败，状态码: {response.status_code}")
-                    print(f"错误响应: {response.text}")
-                    return None
-                
-                result = response.json()
-                workflow_count = len(result)
-                print(f"找到 {workflow_count} 个已发布工作流")
-                return result
+            response = await self._get(url)
+            
+            if response.status_code != 200:
+                print(f"查询已发布工作流失败，状态码: {response.status_code}")
+                print(f"错误响应: {response.text}")
+                return None
+            
+            result = response.json()
+            workflow_count = len(result)
+            print(f"找到 {workflow_count} 个已发布工作流")
+            return result
         except Exception as e:
             print(f"查询已发布工作流时出错: {str(e)}")
             return None
@@ -208,18 +220,17 @@ class DockstoreDownloader:
         print(f"获取工作流 {workflow_id} 版本 {version_id} 的源文件")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, headers=self.headers)
-                
-                if response.status_code != 200:
-                    print(f"获取源文件失败，状态码: {response.status_code}")
-                    print(f"错误响应: {response.text}")
-                    return None
-                
-                result = response.json()
-                file_count = len(result)
-                print(f"找到 {file_count} 个源文件")
-                return result
+            response = await self._get(url)
+            
+            if response.status_code != 200:
+                print(f"获取源文件失败，状态码: {response.status_code}")
+                print(f"错误响应: {response.text}")
+                return None
+            
+            result = response.json()
+            file_count = len(result)
+            print(f"找到 {file_count} 个源文件")
+            return result
         except Exception as e:
             print(f"获取源文件时出错: {str(e)}")
             return None
@@ -331,6 +342,49 @@ class DockstoreDownloader:
         return await self.download_workflow(organization, workflow_name, output_dir)
 
 
+def scan_workflow_dir(save_dir: Path) -> Tuple[List[str], List[Path]]:
+    """Scan a downloaded workflow directory in a single os.scandir pass.
+
+    Returns the paths of all files, and the directories that have no
+    subdirectories and contain at least one .wdl file. Both lists follow the
+    same top-down order as os.walk. Paths are joined onto save_dir without
+    resolving each entry, so pass an already resolved directory to get
+    absolute paths.
+    """
+    root = os.fspath(save_dir)
+    all_files: List[str] = []
+    wdl_dirs: List[Path] = []
+    stack = [root]
+
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        subdirs = []
+        has_subdir = False
+        has_wdl = False
+        for entry in entries:
+            if entry.is_dir():
+                has_subdir = True
+                # 与 os.walk 一致：不进入指向目录的符号链接
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+            else:
+                all_files.append(entry.path)
+                if entry.name.endswith(".wdl"):
+                    has_wdl = True
+
+        if has_wdl and not has_subdir:
+            wdl_dirs.append(Path(current))
+        stack.extend(reversed(subdirs))
+
+    return all_files, wdl_dirs
+
+
 async def main():
     """Main function for the Dockstore workflow downloader."""
     parser = argparse.ArgumentParser(description='Dockstore 工作流下载工具')
@@ -378,18 +432,16 @@ async def download_from_mcp(config):
     save_dir = Path(output_path) / f"{org}_{workflow_name}"
     
     # 获取已下载的文件列表
-    files = []
-    for root, _, filenames in os.walk(save_dir):
-        for filename in filenames:
-            file_path = Path(root) / filename
-            rel_path = file_path.relative_to(save_dir)
-            files.append(str(rel_path))
+    all_files, _ = scan_workflow_dir(save_dir)
+    # 文件路径都以 save_dir 为前缀拼接而成，直接切掉前缀得到相对路径
+    base_len = len(os.path.join(save_dir, ""))
+    files = [file_path[base_len:] for file_path in all_files]
     
     return {
-        "success": True + "\n",
-        "save_directory": str(save_dir) + "\n",
-        "organization": org +"\n",
-        "workflow_name": workflow_name +"\n",
+        "success": True,
+        "save_directory": str(save_dir),
+        "organization": org,
+        "workflow_name": workflow_name,
         "files": files
     }
 
@@ -1,23 +1,68 @@
 # bioos_mcp/tools/rerank_client.py
+import heapq
 import requests, json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+
+def _select_top(ranked: List[Dict[str, Any]], top_n: int | None) -> List[Dict[str, Any]]:
+    """按 score 降序取前 top_n 条；top_n 远小于候选数时只维护大小为 top_n 的堆"""
+    if top_n and top_n < len(ranked):
+        return heapq.nlargest(top_n, ranked, key=lambda x: x["score"])
+    return sorted(ranked, key=lambda x: x["score"], reverse=True)
 
 
 class RerankClient:
-    def __init__(self, api_url: str, timeout: int = 30):
+    def __init__(self, api_url: str, timeout: int = 30, session: Optional[requests.Session] = None):
         self.api_url, self.timeout = api_url, timeout
         self.headers = {"Content-Type": "application/json"}
+        # 复用连接（HTTP keep-alive），未传入时使用独立的 Session
+        self.session = session if session is not None else requests.Session()
 
-    def rerank(self, query: str, texts: List[str], top_n: int | None = None) -> List[Dict[str, Any]]:
+    def score(self, query: str, texts: List[str]) -> List[Dict[str, Any]]:
+        """调用重排接口，返回未排序的 [{index, score}, ...]"""
         payload = {"query": query, "texts": texts}
         try:
-            resp = requests.post(self.api_url, json=payload, headers=self.headers, timeout=self.timeout)
+            resp = self.session.post(self.api_url, json=payload, headers=self.headers, timeout=self.timeout)
             resp.raise_for_status()
-            scores = resp.json()            # [{index,score}, ...]
-            ranked = sorted(
-                [{"index": it["index"], "score": it["score"], "text": texts[it["index"]]} for it in scores],
-                key=lambda x: x["score"], reverse=True
-            )
-            return ranked[:top_n] if top_n else ranked
+            return resp.json()
         except (requests.RequestException, json.JSONDecodeError) as e:
             raise RuntimeError(f"Rerank API 调用失败: {e}")
+
+    def rerank(self, query: str, texts: List[str], top_n: int | None = None) -> List[Dict[str, Any]]:
+        scores = self.score(query, texts)             # [{index,score}, ...]
+        ranked = [{"index": it["index"], "score": it["score"], "text": texts[it["index"]]} for it in scores]
+        return _select_top(ranked, top_n)
+
+    @staticmethod
+    def length_batches(texts: List[str], batch_size: int = 32) -> List[List[int]]:
+        """按文本长度分桶，返回每批文本在 texts 中的下标
+
+        长度相近的文本放在同一批，减少 cross-encoder 的 padding 开销。
+        """
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i].split()))
+        return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+    @staticmethod
+    def merge_batches(
+        texts: List[str], batches: List[List[int]], batch_scores: List[List[Dict[str, Any]]], top_n: int | None = None
+    ) -> List[Dict[str, Any]]:
+        """把各批返回的下标映射回 texts 中的原始位置，合并后取前 top_n 条
+
+        前提：重排服务对每个 (query, text) 独立打分（cross-encoder 逐对计算，不做批内归一化），
+        不同请求返回的分数才可以直接比较。服务改为批内归一化时不能再分批合并。
+        """
+        ranked = []
+        for batch, scores in zip(batches, batch_scores):
+            for it in scores:
+                index = batch[it["index"]]
+                ranked.append({"index": index, "score": it["score"], "text": texts[index]})
+        return _select_top(ranked, top_n)
+
+    def rerank_batched(
+        self, query: str, texts: List[str], top_n: int | None = None, batch_size: int = 32
+    ) -> List[Dict[str, Any]]:
+        """按文本长度分桶后依次分批重排，分数可跨批比较的前提见 merge_batches"""
+        if len(texts) <= batch_size:
+            return self.rerank(query, texts, top_n)
+        batches = self.length_batches(texts, batch_size)
+        return self.merge_batches(texts, batches, [self.score(query, [texts[i] for i in b]) for b in batches], top_n)
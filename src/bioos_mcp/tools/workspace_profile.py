@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import json
-import os
 import re
 from datetime import datetime, timezone
 from pathlib import Path
@@ -12,10 +11,16 @@ from bioos.config import Config
 from bioos.resource.workflows import Submission
 from bioos.service.api import list_submissions, list_workflows
 
+from bioos_mcp.tools.bioos_session import bioos_session, get_credentials
+
 def get_workspace_profile_data(cfg: Any) -> Dict[str, Any]:
     ak, sk = get_credentials(cfg.ak, cfg.sk)
-    bioos.login(access_key=ak, secret_key=sk, endpoint=cfg.endpoint)
+    # 所有 SDK 调用都在同一会话内完成，避免并发的其他凭证中途切换全局客户端
+    with bioos_session(cfg.endpoint, ak, sk):
+        return collect_workspace_profile(cfg)
+
 
+def collect_workspace_profile(cfg: Any) -> Dict[str, Any]:
     workspace_id, workspace_row = resolve_workspace(cfg.workspace_name)
     ws = bioos.workspace(workspace_id)
     ies_records, ies_warning, ies_coverage = collect_ies_records(ws, cfg)
@@ -76,18 +81,6 @@ def get_workspace_profile_data(cfg: Any) -> Dict[str, Any]:
     }
 
 
-def get_credentials(user_ak: Optional[str] = None, user_sk: Optional[str] = None) -> Tuple[str, str]:
-    ak = user_ak if user_ak is not None else os.getenv("MIRACLE_ACCESS_KEY")
-    sk = user_sk if user_sk is not None else os.getenv("MIRACLE_SECRET_KEY")
-
-    if not ak:
-        raise ValueError("未提供 MIRACLE_ACCESS_KEY，请设置环境变量 'MIRACLE_ACCESS_KEY' 或在参数中指定")
-    if not sk:
-        raise ValueError("未提供 MIRACLE_SECRET_KEY，请设置环境变量 'MIRACLE_SECRET_KEY' 或在参数中指定")
-
-    return ak, sk
-
-
 def to_iso(value: Any) -> Optional[str]:
     if value is None:
         return None
@@ -146,10 +139,13 @@ def normalize_params(items: Any) -> List[Dict[str, Any]]:
 
 def resolve_workspace(workspace_name: str) -> Tuple[str, Dict[str, Any]]:
     workspaces = bioos.list_workspaces()
-    matched = workspaces[workspaces["Name"] == workspace_name]
-    if getattr(matched, "empty", True):
+    if getattr(workspaces, "empty", True):
+        raise ValueError(f"未找到工作空间：{workspace_name}")
+    # 直接定位首个匹配行，不再构造过滤后的 DataFrame
+    mask = (workspaces["Name"] == workspace_name).to_numpy()
+    if not mask.any():
         raise ValueError(f"未找到工作空间：{workspace_name}")
-    row = matched.iloc[0].to_dict()
+    row = workspaces.iloc[int(mask.argmax())].to_dict()
     return str(row["ID"]), row
 
 